@@ -5,13 +5,15 @@
 
 import sys
 import os
+import ast
 import asyncio
 import time
 from datetime import datetime
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, PROJECT_ROOT)
 
 # 新增的测试文件列表
 NEW_TEST_FILES = [
@@ -23,6 +25,15 @@ NEW_TEST_FILES = [
     "tests/comprehensive/unit/services/test_memory_lightweight_enhanced.py"
 ]
 
+def has_main(file_path):
+    """不导入模块，通过语法树判断测试文件是否定义了异步 main 函数"""
+    source = Path(PROJECT_ROOT, file_path).read_text(encoding='utf-8')
+    tree = ast.parse(source, filename=file_path)
+    return any(
+        isinstance(node, ast.AsyncFunctionDef) and node.name == 'main'
+        for node in tree.body
+    )
+
 async def run_test_file(file_path):
     """运行单个测试文件"""
     print(f"\n{'='*80}")
@@ -32,17 +43,20 @@ async def run_test_file(file_path):
     start_time = time.time()
     
     try:
-        # 动态导入测试模块
-        module_path = file_path.replace('/', '.').replace('.py', '')
-        module = __import__(module_path, fromlist=['main'])
-        
         # 运行测试
-        if hasattr(module, 'main'):
+        if has_main(file_path):
+            # 动态导入测试模块
+            module_path = file_path.replace('/', '.').replace('.py', '')
+            module = __import__(module_path, fromlist=['main'])
             result = await module.main()
             success = result == 0
         else:
-            print(f"⚠️  警告: {file_path} 没有 main 函数")
-            success = False
+            # 没有 main 函数的测试文件交给 pytest 运行（不导入，避免缺少外部依赖 Mock 时导入失败）
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", file_path,
+                cwd=PROJECT_ROOT
+            )
+            success = await process.wait() == 0
             
     except Exception as e:
         print(f"❌ 错误: {e}")
@@ -125,9 +139,9 @@ async def main():
     
     test_counts = {
         'test_api_comprehensive.py': 15,
-        'test_command_manager_comprehensive.py': 24,
+        'test_command_manager_comprehensive.py': 44,
         'test_event_bus_enhanced.py': 23,
-        'test_terminal_bridge_enhanced.py': 29,
+        'test_terminal_bridge_enhanced.py': 41,
         'test_context_monitor_enhanced.py': 30,
         'test_memory_lightweight_enhanced.py': 11
     }
@@ -196,11 +196,19 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "e2e: 端到端测试")
     config.addinivalue_line("markers", "slow: 慢速测试")
     config.addinivalue_line("markers", "asyncio: 异步测试")
+    config.addinivalue_line("markers", "benchmark: 性能基准测试（需要 pytest-benchmark）")
 
 
 def pytest_collection_modifyitems(config, items):
     """修改测试收集"""
+    # 性能基准测试只在 -m 表达式提到 benchmark 时运行
+    run_benchmarks = "benchmark" in (config.getoption("markexpr") or "")
+    skip_benchmark = pytest.mark.skip(reason="性能基准测试需用 -m benchmark 显式运行")
+    
     for item in items:
-        # 自动为异步测试添加 asyncio 标记
-        if asyncio.iscoroutinefunction(item.function):
-            item.add_marker(pytest.mark.asyncio)
\ No newline at end of file
+        # 自动为异步测试添加 asyncio 标记；已显式标记的保留其 loop_scope
+        if asyncio.iscoroutinefunction(item.function) and item.get_closest_marker("asyncio") is None:
+            item.add_marker(pytest.mark.asyncio)
+        
+        if not run_benchmarks and item.get_closest_marker("benchmark"):
+            item.add_marker(skip_benchmark)
\ No newline at end of file
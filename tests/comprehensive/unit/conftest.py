@@ -0,0 +1,40 @@
+"""
+单元测试共享 fixtures
+"""
+from unittest.mock import AsyncMock, patch, create_autospec
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture(scope="module")
+def command_manager_bus():
+    """模块内共享的 CommandManager 事件总线 Mock，按 EventBus 接口限定属性"""
+    from backend.services.event_bus import EventBus
+    bus = AsyncMock(spec_set=EventBus)
+    with patch('backend.core.command_manager.get_event_bus', return_value=bus):
+        yield bus
+
+
+@pytest.fixture(scope="module")
+def _terminal_template():
+    """按 TerminalBridge 接口自动生成的终端 Mock，模块内只创建一次"""
+    from backend.services.terminal_bridge import TerminalBridge
+    # 不用 spec_set：state、process 等实例属性在 __init__ 中赋值，类上不存在，需要补到 Mock 上
+    return create_autospec(TerminalBridge, instance=True)
+
+
+@pytest.fixture
+def mock_terminal(command_manager_bus, _terminal_template):
+    """复用终端 Mock 模板，测试结束后清空调用记录和预设行为"""
+    from backend.services.terminal_bridge import TerminalState
+    # 每个测试都从 TerminalBridge() 的初始实例属性开始
+    _terminal_template.workspace = Path.cwd()
+    _terminal_template.process = None
+    _terminal_template.master_fd = None
+    _terminal_template.state = TerminalState()
+    _terminal_template.output_callback = None
+    _terminal_template.output_buffer = ""
+    yield _terminal_template
+    _terminal_template.reset_mock(return_value=True, side_effect=True)
+    # 共享总线跨测试复用，测试结束后清空调用记录
+    command_manager_bus.publish.reset_mock()
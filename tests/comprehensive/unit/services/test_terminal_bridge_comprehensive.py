@@ -5,26 +5,29 @@ TerminalBridge 完整测试套件
 """
 
 import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import pytest
 
 
 import asyncio
-from unittest.mock import Mock, AsyncMock, patch, MagicMock, call
+import inspect
+import io
+from unittest.mock import Mock, AsyncMock, MagicMock, call
 from datetime import datetime
 from pathlib import Path
 import subprocess
 import signal
 
-# Mock 外部依赖
-sys.modules['pydantic'] = MagicMock()
-sys.modules['pydantic_settings'] = MagicMock()
+# pydantic 等外部依赖由 tests/comprehensive/conftest.py 统一 Mock
+
+# 共享的进程 Mock（仅预设 poll 返回值，测试中不修改）
+_MOCK_PROC_ALIVE = Mock()
+_MOCK_PROC_ALIVE.poll.return_value = None  # 运行中
+_MOCK_PROC_DEAD = Mock()
+_MOCK_PROC_DEAD.poll.return_value = 0  # 已退出
 
 
 # ===== TerminalState 测试 =====
-@pytest.mark.asyncio
-async def test_terminal_state():
+def test_terminal_state():
     """测试 TerminalState 数据类"""
     from backend.services.terminal_bridge import TerminalState
     
@@ -47,14 +50,13 @@ async def test_terminal_state():
 
 
 # ===== TerminalBridge 初始化测试 =====
-@pytest.mark.asyncio
-async def test_terminal_bridge_init():
+def test_terminal_bridge_init():
     """测试 TerminalBridge 初始化"""
     from backend.services.terminal_bridge import TerminalBridge
     
     # 默认初始化
     bridge = TerminalBridge()
-    assert bridge.workspace == Path(".").absolute()
+    assert bridge.workspace == Path.cwd()
     assert bridge.process is None
     assert bridge.master_fd is None
     assert bridge.state.is_alive == False
@@ -67,8 +69,7 @@ async def test_terminal_bridge_init():
     assert bridge.workspace == Path(workspace).absolute()
 
 
-@pytest.mark.asyncio
-async def test_terminal_bridge_configuration():
+def test_terminal_bridge_configuration():
     """测试 TerminalBridge 配置参数"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -82,14 +83,11 @@ async def test_terminal_bridge_configuration():
     assert bridge.restart_delay == 2.0
     
     # 检查提示符模式
-    assert 'claude-code>' in bridge.PROMPT_PATTERNS
-    assert '$' in bridge.PROMPT_PATTERNS
-    assert '>' in bridge.PROMPT_PATTERNS
+    assert {'claude-code>', '$', '>'} <= set(bridge.PROMPT_PATTERNS)
 
 
 # ===== 状态检查测试 =====
-@pytest.mark.asyncio
-async def test_is_alive():
+def test_is_alive():
     """测试进程存活检查"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -99,18 +97,15 @@ async def test_is_alive():
     assert bridge.is_alive() == False
     
     # 有进程但已退出
-    mock_process = Mock()
-    mock_process.poll.return_value = 0  # 已退出
-    bridge.process = mock_process
+    bridge.process = _MOCK_PROC_DEAD
     assert bridge.is_alive() == False
     
     # 有进程且运行中
-    mock_process.poll.return_value = None  # 运行中
+    bridge.process = _MOCK_PROC_ALIVE
     assert bridge.is_alive() == True
 
 
-@pytest.mark.asyncio
-async def test_is_running():
+def test_is_running():
     """测试 is_running 属性"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -121,15 +116,12 @@ async def test_is_running():
     
     # 设置状态
     bridge.state.is_alive = True
-    mock_process = Mock()
-    mock_process.poll.return_value = None
-    bridge.process = mock_process
+    bridge.process = _MOCK_PROC_ALIVE
     
     assert bridge.is_running == True
 
 
-@pytest.mark.asyncio
-async def test_set_output_callback():
+def test_set_output_callback():
     """测试设置输出回调"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -143,7 +135,7 @@ async def test_set_output_callback():
 
 
 # ===== 命令发送测试 =====
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_send_command_not_started():
     """测试向未启动的终端发送命令"""
     from backend.services.terminal_bridge import TerminalBridge
@@ -151,14 +143,11 @@ async def test_send_command_not_started():
     bridge = TerminalBridge()
     bridge.state.is_alive = False
     
-    try:
+    with pytest.raises(RuntimeError, match="Terminal not started"):
         await bridge.send_command("test")
-        assert False, "应该抛出异常"
-    except RuntimeError as e:
-        assert "Terminal not started" in str(e)
 
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_send_command_not_ready():
     """测试向未准备好的终端发送命令"""
     from backend.services.terminal_bridge import TerminalBridge
@@ -167,15 +156,12 @@ async def test_send_command_not_ready():
     bridge.state.is_alive = True
     bridge.state.is_ready = False
     
-    try:
+    with pytest.raises(RuntimeError, match="Terminal not ready"):
         await bridge.send_command("test")
-        assert False, "应该抛出异常"
-    except RuntimeError as e:
-        assert "Terminal not ready" in str(e)
 
 
-@pytest.mark.asyncio
-async def test_send_command_success():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_send_command_success(monkeypatch):
     """测试成功发送命令"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -184,17 +170,19 @@ async def test_send_command_success():
     bridge.state.is_ready = True
     bridge.master_fd = 10
     
-    with patch('backend.services.terminal_bridge.os.write') as mock_write:
-        await bridge.send_command("echo test")
-        
-        # 验证写入
-        mock_write.assert_called_once_with(10, b"echo test\n")
-        assert bridge.state.command_count == 1
-        assert bridge.state.last_activity is not None
+    calls = []
+    monkeypatch.setattr('backend.services.terminal_bridge.os.write',
+                        lambda fd, data: calls.append((fd, data)) or len(data))
+    await bridge.send_command("echo test")
+    
+    # 验证写入
+    assert calls == [(10, b"echo test\n")]
+    assert bridge.state.command_count == 1
+    assert bridge.state.last_activity is not None
 
 
-@pytest.mark.asyncio
-async def test_send_command_error():
+@pytest.mark.asyncio(loop_scope="module")
+async def test_send_command_error(monkeypatch):
     """测试命令发送错误"""
     from backend.services.terminal_bridge import TerminalBridge
     
@@ -203,16 +191,20 @@ async def test_send_command_error():
     bridge.state.is_ready = True
     bridge.master_fd = 10
     
-    with patch('backend.services.terminal_bridge.os.write', side_effect=OSError("Write failed")):
-        try:
+    def failing_write(fd, data):
+        raise OSError("Write failed")
+    
+    monkeypatch.setattr('backend.services.terminal_bridge.os.write', failing_write)
+    for _ in range(10):
+        with pytest.raises(OSError, match="Write failed"):
             await bridge.send_command("test")
-            assert False, "应该抛出异常"
-        except Exception:
-            assert bridge.state.error_count == 1
+    
+    # 每次失败都应累计错误计数
+    assert bridge.state.error_count == 10
 
 
 # ===== 停止进程测试 =====
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="module")
 async def test_stop_not_running():
     """测试停止未运行的进程"""
     from backend.services.terminal_bridge import TerminalBridge
@@ -225,54 +217,51 @@ async def test_stop_not_running():
 
 
 # ===== 接口实现测试 =====
-@pytest.mark.asyncio
-async def test_interface_implementation():
+def test_interface_implementation():
     """测试接口实现完整性"""
     from backend.services.terminal_bridge import TerminalBridge, ITerminalBridge
     
     bridge = TerminalBridge()
     
-    # 验证实现了所有接口方法
-    assert hasattr(bridge, 'start')
-    assert hasattr(bridge, 'stop')
-    assert hasattr(bridge, 'send_command')
-    assert hasattr(bridge, 'is_alive')
-    assert hasattr(bridge, 'set_output_callback')
-    
-    # 验证是接口的实例
+    # ITerminalBridge 的抽象方法保证了接口方法齐全
     assert isinstance(bridge, ITerminalBridge)
 
 
 # ===== 提示符检测测试 =====
-@pytest.mark.asyncio
-async def test_detect_prompt():
+PROMPT_CASES = [
+    ("user@host:~$ ", True),
+    ("claude-code> ", True),
+    ("[user@host]$ ", True),
+    ("❯ ", True),
+    ("some random text", False),
+    ("", False)
+]
+
+
+@pytest.mark.parametrize("output,expected", PROMPT_CASES)
+def test_detect_prompt(output, expected):
     """测试提示符检测"""
     from backend.services.terminal_bridge import TerminalBridge
     
     bridge = TerminalBridge()
-    
-    # 测试各种提示符
-    test_cases = [
-        ("user@host:~$ ", True),
-        ("claude-code> ", True),
-        ("[user@host]$ ", True),
-        ("❯ ", True),
-        ("some random text", False),
-        ("", False)
-    ]
-    
-    for output, expected in test_cases:
-        result = bridge._detect_prompt(output)
-        assert result == expected, f"Failed for: {output}"
+    assert bridge._detect_prompt(output) == expected
+
+
+def _detect_prompt_all_cases():
+    """独立运行时遍历所有提示符用例"""
+    for output, expected in PROMPT_CASES:
+        test_detect_prompt(output, expected)
 
 
 # ===== 主测试运行器 =====
 async def main():
     """运行所有测试"""
-    print("🚀 运行 TerminalBridge 完整测试套件")
-    print("=" * 80)
+    # 输出先写入缓冲区，结束时一次性写到 stdout
+    buf = io.StringIO()
+    print("🚀 运行 TerminalBridge 完整测试套件", file=buf)
+    print("=" * 80, file=buf)
     
-    tests = [
+    tests = (
         # 数据类测试
         test_terminal_state,
         
@@ -298,31 +287,50 @@ async def main():
         test_interface_implementation,
         
         # 提示符检测测试
-        test_detect_prompt
-    ]
-    
-    passed = 0
-    failed = 0
-    
-    for test in tests:
-        try:
-            print(f"\n🧪 运行: {test.__name__}")
-            await test()
-            print(f"   ✅ 通过")
-            passed += 1
-        except Exception as e:
-            failed += 1
-            print(f"   ❌ 失败: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    print("\n" + "=" * 80)
-    print(f"✅ 通过: {passed}")
-    print(f"❌ 失败: {failed}")
-    print(f"总计: {len(tests)}")
-    
+        _detect_prompt_all_cases
+    )
+    
+    # monkeypatch 修改的是全局 os.write，这类测试需要串行执行
+    patch_lock = asyncio.Lock()
+    
+    async def run(test):
+        if 'monkeypatch' not in inspect.signature(test).parameters:
+            result = test()
+            if asyncio.iscoroutine(result):
+                await result
+            return
+        async with patch_lock:
+            with pytest.MonkeyPatch.context() as monkeypatch:
+                result = test(monkeypatch)
+                if asyncio.iscoroutine(result):
+                    await result
+    
+    # 各测试互相独立，并发执行
+    results = await asyncio.gather(*(run(test) for test in tests), return_exceptions=True)
+    
+    import traceback
+    for test, result in zip(tests, results):
+        print(f"\n🧪 运行: {test.__name__}", file=buf)
+        if isinstance(result, Exception):
+            print(f"   ❌ 失败: {result}", file=buf)
+            traceback.print_exception(type(result), result, result.__traceback__, file=buf)
+        else:
+            print(f"   ✅ 通过", file=buf)
+    
+    failed = sum(1 for result in results if isinstance(result, Exception))
+    passed = len(results) - failed
+    
+    print("\n" + "=" * 80, file=buf)
+    print(f"✅ 通过: {passed}", file=buf)
+    print(f"❌ 失败: {failed}", file=buf)
+    print(f"总计: {len(tests)}", file=buf)
+    
+    sys.stdout.write(buf.getvalue())
     return 0 if failed == 0 else 1
 
 
 if __name__ == "__main__":
+    # 独立运行时没有 conftest.py，导入 backend 前先补上外部依赖的 Mock
+    sys.modules.setdefault('pydantic', MagicMock())
+    sys.modules.setdefault('pydantic_settings', MagicMock())
     sys.exit(asyncio.run(main()))
\ No newline at end of file
@@ -8,23 +8,95 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../..')))
 
-from unittest.mock import Mock, AsyncMock, patch, MagicMock, call, mock_open
+from unittest.mock import Mock, AsyncMock, patch, call, mock_open, create_autospec
+from contextlib import ExitStack
+from types import SimpleNamespace
 import asyncio
 from datetime import datetime
 from pathlib import Path
 import subprocess
-import signal
-import fcntl
-import select
+import pytest
 
-# Mock 外部依赖
-sys.modules['pydantic'] = MagicMock()
-sys.modules['pydantic_settings'] = MagicMock()
+# pydantic 等外部依赖由 tests/comprehensive/conftest.py 统一 Mock
 
 from backend.services.terminal_bridge import TerminalBridge, TerminalState, ITerminalBridge
 from backend.models.base import EventType
 
 
+def _output_callback(output: str) -> None:
+    """同步输出回调签名，用于 create_autospec"""
+
+
+async def _async_output_callback(output: str) -> None:
+    """异步输出回调签名，用作 AsyncMock 的 spec"""
+
+
+FROZEN_TIME = datetime(2024, 1, 1)
+_EXPECTED_CWD = Path(".").absolute()
+
+
+class _FrozenDatetime(datetime):
+    """now() 固定返回 FROZEN_TIME 的 datetime"""
+    
+    @classmethod
+    def now(cls, tz=None):
+        return FROZEN_TIME
+
+
+@pytest.fixture(autouse=True)
+def _freeze_clock(monkeypatch):
+    """冻结 terminal_bridge 中的 datetime.now()"""
+    monkeypatch.setattr('backend.services.terminal_bridge.datetime', _FrozenDatetime)
+
+
+@pytest.fixture(autouse=True)
+def _patch_event_bus():
+    """为每个测试替换事件总线，返回 publish 为 AsyncMock 的轻量总线"""
+    bus = SimpleNamespace(publish=AsyncMock())
+    with patch('backend.services.terminal_bridge.get_event_bus', return_value=bus):
+        yield bus
+
+
+@pytest.fixture
+def bridge(_patch_event_bus):
+    """每个测试独立的 TerminalBridge 实例"""
+    return TerminalBridge()
+
+
+@pytest.fixture
+def patched_pty(bridge):
+    """替换 start() 依赖的 PTY、fcntl、子进程和等待就绪逻辑"""
+    with ExitStack() as stack:
+        mocks = {
+            'openpty': stack.enter_context(
+                patch('backend.services.terminal_bridge.pty.openpty', return_value=(3, 4))
+            ),
+            'fcntl': stack.enter_context(patch('backend.services.terminal_bridge.fcntl.fcntl')),
+            'Popen': stack.enter_context(patch('backend.services.terminal_bridge.subprocess.Popen')),
+            'close': stack.enter_context(patch('backend.services.terminal_bridge.os.close')),
+        }
+        mocks['Popen'].return_value.poll.return_value = None
+        stack.enter_context(patch.object(bridge, '_wait_for_ready', AsyncMock()))
+        yield mocks
+
+
+@pytest.fixture
+def running_process():
+    """运行中的子进程 Mock，接口受 subprocess.Popen 约束"""
+    process = Mock(spec=subprocess.Popen)
+    process.pid = 12345
+    process.returncode = None
+    process.poll.return_value = None
+    return process
+
+
+@pytest.fixture(scope="module")
+def frozen_bridge():
+    """模块内共享的 TerminalBridge，仅供只读断言使用"""
+    with patch('backend.services.terminal_bridge.get_event_bus'):
+        return TerminalBridge()
+
+
 class TestTerminalState:
     """测试 TerminalState 数据类"""
     
@@ -62,548 +134,336 @@ class TestTerminalState:
 class TestTerminalBridgeInit:
     """测试 TerminalBridge 初始化"""
     
-    async def test_initialization_default(self):
+    def test_initialization_default(self, frozen_bridge):
         """测试默认初始化"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            assert bridge.workspace == Path(".").absolute()
-            assert bridge.process is None
-            assert bridge.master_fd is None
-            assert isinstance(bridge.state, TerminalState)
-            assert bridge.output_callback is None
-            assert bridge.output_buffer == ""
+        assert frozen_bridge.workspace == _EXPECTED_CWD
+        assert frozen_bridge.process is None
+        assert frozen_bridge.master_fd is None
+        assert isinstance(frozen_bridge.state, TerminalState)
+        assert frozen_bridge.output_callback is None
+        assert frozen_bridge.output_buffer == ""
     
     async def test_initialization_with_workspace(self):
         """测试指定工作目录初始化"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge("/test/workspace")
-            
-            assert bridge.workspace == Path("/test/workspace").absolute()
-    
-    async def test_configuration_values(self):
+        bridge = TerminalBridge("/test/workspace")
+        
+        assert bridge.workspace == Path("/test/workspace").absolute()
+    
+    @pytest.mark.parametrize("attr,expected", [
+        ("startup_timeout", 10.0),
+        ("command_timeout", 30.0),
+        ("health_check_interval", 5.0),
+        ("max_restart_attempts", 3),
+        ("restart_delay", 2.0),
+    ])
+    def test_configuration_values(self, frozen_bridge, attr, expected):
         """测试配置值"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            assert bridge.startup_timeout == 10.0
-            assert bridge.command_timeout == 30.0
-            assert bridge.health_check_interval == 5.0
-            assert bridge.max_restart_attempts == 3
-            assert bridge.restart_delay == 2.0
+        assert getattr(frozen_bridge, attr) == expected
 
 
 class TestTerminalBridgeStart:
     """测试启动功能"""
     
-    async def test_start_success(self):
+    async def test_start_success(self, _patch_event_bus, bridge, patched_pty):
         """测试成功启动"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            
-            # Mock PTY and subprocess
-            with patch('backend.services.terminal_bridge.pty.openpty') as mock_pty:
-                mock_pty.return_value = (3, 4)  # master_fd, slave_fd
-                
-                with patch('backend.services.terminal_bridge.fcntl.fcntl'):
-                    with patch('backend.services.terminal_bridge.subprocess.Popen') as mock_popen:
-                        mock_process = Mock()
-                        mock_process.poll.return_value = None
-                        mock_popen.return_value = mock_process
-                        
-                        with patch('backend.services.terminal_bridge.os.close'):
-                            with patch.object(bridge, '_wait_for_ready', AsyncMock()):
-                                await bridge.start()
-                        
-                        assert bridge.state.is_alive == True
-                        assert bridge.process == mock_process
-                        assert bridge.master_fd == 3
-                        mock_bus.publish.assert_called()
+        await bridge.start()
+        
+        assert bridge.state.is_alive == True
+        assert bridge.process == patched_pty['Popen'].return_value
+        assert bridge.master_fd == 3
+        _patch_event_bus.publish.assert_called()
     
-    async def test_start_already_running(self):
+    async def test_start_already_running(self, bridge):
         """测试重复启动"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            
-            # 不应该启动新进程
-            with patch('backend.services.terminal_bridge.pty.openpty') as mock_pty:
-                await bridge.start()
-                mock_pty.assert_not_called()
+        bridge.state.is_alive = True
+        
+        # 不应该启动新进程
+        with patch('backend.services.terminal_bridge.pty.openpty') as mock_pty:
+            await bridge.start()
+            mock_pty.assert_not_called()
     
-    async def test_start_with_claude_code_path(self):
+    async def test_start_with_claude_code_path(self, bridge, patched_pty):
         """测试使用指定的 claude-code 路径"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            
-            with patch('backend.services.terminal_bridge.settings') as mock_settings:
-                mock_settings.claude_code_path = "/usr/local/bin/claude-code"
+        with patch('backend.services.terminal_bridge.settings') as mock_settings:
+            mock_settings.claude_code_path = "/usr/local/bin/claude-code"
+            
+            with patch('backend.services.terminal_bridge.Path') as mock_path:
+                mock_path_instance = Mock()
+                mock_path_instance.is_absolute.return_value = True
+                mock_path_instance.exists.return_value = True
+                mock_path.return_value = mock_path_instance
                 
-                with patch('backend.services.terminal_bridge.Path') as mock_path:
-                    mock_path_instance = Mock()
-                    mock_path_instance.is_absolute.return_value = True
-                    mock_path_instance.exists.return_value = True
-                    mock_path.return_value = mock_path_instance
-                    
-                    with patch('backend.services.terminal_bridge.pty.openpty') as mock_pty:
-                        mock_pty.return_value = (3, 4)
-                        
-                        with patch('backend.services.terminal_bridge.subprocess.Popen') as mock_popen:
-                            with patch('backend.services.terminal_bridge.fcntl.fcntl'):
-                                with patch('backend.services.terminal_bridge.os.close'):
-                                    with patch.object(bridge, '_wait_for_ready', AsyncMock()):
-                                        await bridge.start()
-                            
-                            # 验证使用了指定路径
-                            mock_popen.assert_called()
-                            call_args = mock_popen.call_args[0][0]
-                            assert "/usr/local/bin/claude-code" in call_args[0]
+                await bridge.start()
+        
+        # 验证使用了指定路径
+        mock_popen = patched_pty['Popen']
+        mock_popen.assert_called()
+        call_args = mock_popen.call_args[0][0]
+        assert "/usr/local/bin/claude-code" in call_args[0]
     
-    async def test_start_fallback_to_shell(self):
+    async def test_start_fallback_to_shell(self, bridge, patched_pty):
         """测试回退到 shell"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
+        with patch('backend.services.terminal_bridge.settings') as mock_settings:
+            mock_settings.claude_code_path = "claude-code"
             
-            with patch('backend.services.terminal_bridge.settings') as mock_settings:
-                mock_settings.claude_code_path = "claude-code"
-                
-                with patch('shutil.which', return_value=None):
-                    with patch('backend.services.terminal_bridge.os.environ.get', return_value='/bin/zsh'):
-                        with patch('backend.services.terminal_bridge.pty.openpty') as mock_pty:
-                            mock_pty.return_value = (3, 4)
-                            
-                            with patch('backend.services.terminal_bridge.subprocess.Popen') as mock_popen:
-                                with patch('backend.services.terminal_bridge.fcntl.fcntl'):
-                                    with patch('backend.services.terminal_bridge.os.close'):
-                                        with patch.object(bridge, '_wait_for_ready', AsyncMock()):
-                                            await bridge.start()
-                                
-                                # 验证使用了 shell
-                                call_args = mock_popen.call_args[0][0]
-                                assert '/bin/zsh' in call_args[0]
-                                assert '-i' in call_args
+            with patch('shutil.which', return_value=None):
+                with patch('backend.services.terminal_bridge.os.environ.get', return_value='/bin/zsh'):
+                    await bridge.start()
+        
+        # 验证使用了 shell
+        call_args = patched_pty['Popen'].call_args[0][0]
+        assert '/bin/zsh' in call_args[0]
+        assert '-i' in call_args
     
-    async def test_start_failure(self):
+    async def test_start_failure(self, bridge):
         """测试启动失败"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            
-            with patch('backend.services.terminal_bridge.pty.openpty', side_effect=Exception("PTY error")):
-                try:
-                    await bridge.start()
-                    assert False, "Should raise exception"
-                except Exception:
-                    pass  # Expected
+        with patch('backend.services.terminal_bridge.pty.openpty', side_effect=Exception("PTY error")):
+            with pytest.raises(Exception, match="PTY error"):
+                await bridge.start()
 
 
 class TestTerminalBridgeStop:
     """测试停止功能"""
     
-    async def test_stop_graceful(self):
+    async def test_stop_graceful(self, bridge, running_process):
         """测试优雅停止"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.state.is_ready = True
-            
-            mock_process = Mock()
-            mock_process.poll.return_value = None
-            bridge.process = mock_process
-            
-            with patch.object(bridge, 'send_command', AsyncMock()):
-                with patch.object(bridge, '_cleanup', AsyncMock()):
-                    await bridge.stop()
-                    
-                    bridge.send_command.assert_called_once_with("exit")
+        bridge.state.is_alive = True
+        bridge.state.is_ready = True
+        
+        bridge.process = running_process
+        
+        with patch.object(bridge, 'send_command', AsyncMock()):
+            with patch.object(bridge, '_cleanup', AsyncMock()):
+                await bridge.stop()
+                
+                bridge.send_command.assert_called_once_with("exit")
     
-    async def test_stop_force_kill(self):
+    async def test_stop_force_kill(self, bridge, running_process):
         """测试强制终止"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            
-            mock_process = Mock()
-            mock_process.poll.return_value = None  # Still running
-            bridge.process = mock_process
-            
-            with patch.object(bridge, '_wait_for_exit', AsyncMock(side_effect=asyncio.TimeoutError)):
-                with patch.object(bridge, '_cleanup', AsyncMock()):
-                    await bridge.stop()
-                    
-                    mock_process.terminate.assert_called_once()
-                    mock_process.kill.assert_called_once()
+        bridge.state.is_alive = True
+        
+        bridge.process = running_process  # Still running
+        
+        with patch.object(bridge, '_wait_for_exit', AsyncMock(side_effect=asyncio.TimeoutError)):
+            with patch.object(bridge, '_cleanup', AsyncMock()):
+                await bridge.stop()
+                
+                running_process.terminate.assert_called_once()
+                running_process.kill.assert_called_once()
     
-    async def test_stop_not_running(self):
+    async def test_stop_not_running(self, bridge):
         """测试停止未运行的进程"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = False
-            
-            with patch.object(bridge, '_cleanup', AsyncMock()) as mock_cleanup:
-                await bridge.stop()
-                mock_cleanup.assert_not_called()
+        bridge.state.is_alive = False
+        
+        with patch.object(bridge, '_cleanup', AsyncMock()) as mock_cleanup:
+            await bridge.stop()
+            mock_cleanup.assert_not_called()
 
 
 class TestTerminalBridgeCommands:
     """测试命令发送功能"""
     
-    async def test_send_command_success(self):
+    async def test_send_command_success(self, bridge):
         """测试成功发送命令"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.state.is_ready = True
-            bridge.master_fd = 3
+        bridge.state.is_alive = True
+        bridge.state.is_ready = True
+        bridge.master_fd = 3
+        
+        with patch('backend.services.terminal_bridge.os.write') as mock_write:
+            await bridge.send_command("echo test")
             
-            with patch('backend.services.terminal_bridge.os.write') as mock_write:
-                await bridge.send_command("echo test")
-                
-                mock_write.assert_called_once_with(3, b"echo test\n")
-                assert bridge.state.command_count == 1
-                assert isinstance(bridge.state.last_activity, datetime)
+            mock_write.assert_called_once_with(3, b"echo test\n")
+            assert bridge.state.command_count == 1
+            assert bridge.state.last_activity == FROZEN_TIME
     
-    async def test_send_command_not_started(self):
+    async def test_send_command_not_started(self, bridge):
         """测试未启动时发送命令"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = False
-            
-            try:
-                await bridge.send_command("echo test")
-                assert False, "Should raise RuntimeError"
-            except RuntimeError as e:
-                assert "Terminal not started" in str(e)
+        bridge.state.is_alive = False
+        
+        with pytest.raises(RuntimeError, match="Terminal not started"):
+            await bridge.send_command("echo test")
     
-    async def test_send_command_not_ready(self):
+    async def test_send_command_not_ready(self, bridge):
         """测试未就绪时发送命令"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.state.is_ready = False
-            
-            try:
-                await bridge.send_command("echo test")
-                assert False, "Should raise RuntimeError"
-            except RuntimeError as e:
-                assert "Terminal not ready" in str(e)
+        bridge.state.is_alive = True
+        bridge.state.is_ready = False
+        
+        with pytest.raises(RuntimeError, match="Terminal not ready"):
+            await bridge.send_command("echo test")
     
-    async def test_send_command_with_error(self):
+    async def test_send_command_with_error(self, bridge):
         """测试发送命令出错"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.state.is_ready = True
-            bridge.master_fd = 3
-            
-            with patch('backend.services.terminal_bridge.os.write', side_effect=OSError("Write error")):
-                try:
-                    await bridge.send_command("echo test")
-                    assert False, "Should raise OSError"
-                except OSError:
-                    assert bridge.state.error_count == 1
+        bridge.state.is_alive = True
+        bridge.state.is_ready = True
+        bridge.master_fd = 3
+        
+        with patch('backend.services.terminal_bridge.os.write', side_effect=OSError("Write error")):
+            with pytest.raises(OSError):
+                await bridge.send_command("echo test")
+        
+        assert bridge.state.error_count == 1
 
 
 class TestTerminalBridgeOutput:
     """测试输出处理"""
     
-    async def test_output_callback(self):
+    async def test_output_callback(self, bridge):
         """测试输出回调"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            # 设置回调
-            callback = Mock()
-            bridge.set_output_callback(callback)
-            assert bridge.output_callback == callback
+        # 设置回调
+        callback = create_autospec(_output_callback)
+        bridge.set_output_callback(callback)
+        assert bridge.output_callback == callback
     
-    async def test_process_output_line(self):
+    async def test_process_output_line(self, _patch_event_bus, bridge):
         """测试处理输出行"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            
-            # 设置同步回调
-            sync_callback = Mock()
-            bridge.set_output_callback(sync_callback)
-            
-            await bridge._process_output_line("test output")
-            
-            sync_callback.assert_called_once_with("test output\n")
-            mock_bus.publish.assert_called_once()
+        
+        # 设置同步回调
+        sync_callback = create_autospec(_output_callback)
+        bridge.set_output_callback(sync_callback)
+        
+        await bridge._process_output_line("test output")
+        
+        sync_callback.assert_called_once_with("test output\n")
+        _patch_event_bus.publish.assert_called_once()
     
-    async def test_process_output_line_async_callback(self):
+    async def test_process_output_line_async_callback(self, bridge):
         """测试异步回调"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            
-            # 设置异步回调
-            async_callback = AsyncMock()
-            bridge.set_output_callback(async_callback)
-            
-            await bridge._process_output_line("test output")
-            
-            async_callback.assert_called_once_with("test output\n")
+        # 设置异步回调
+        async_callback = AsyncMock(spec=_async_output_callback)
+        bridge.set_output_callback(async_callback)
+        
+        await bridge._process_output_line("test output")
+        
+        async_callback.assert_called_once_with("test output\n")
     
-    async def test_process_output_line_with_prompt(self):
+    async def test_process_output_line_with_prompt(self, bridge):
         """测试处理包含提示符的输出"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            bridge.state.is_ready = False
-            
-            await bridge._process_output_line("claude-code>")
-            
-            assert bridge.state.is_ready == True
-    
-    async def test_detect_prompt(self):
+        bridge.state.is_ready = False
+        
+        await bridge._process_output_line("claude-code>")
+        
+        assert bridge.state.is_ready == True
+    
+    @pytest.mark.parametrize("s,expected", [
+        ("claude-code>", True),
+        ("Human:", True),
+        ("Assistant:", True),
+        ("$ ", True),
+        ("❯ ", True),
+        ("Continue? ", True),
+        ("Y/N", True),
+        # 非提示符
+        ("regular output", False),
+        ("", False),
+    ])
+    def test_detect_prompt(self, bridge, s, expected):
         """测试提示符检测"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            # 测试各种提示符
-            assert bridge._detect_prompt("claude-code>") == True
-            assert bridge._detect_prompt("Human:") == True
-            assert bridge._detect_prompt("Assistant:") == True
-            assert bridge._detect_prompt("$ ") == True
-            assert bridge._detect_prompt("❯ ") == True
-            assert bridge._detect_prompt("Continue? ") == True
-            assert bridge._detect_prompt("Y/N") == True
-            
-            # 测试非提示符
-            assert bridge._detect_prompt("regular output") == False
-            assert bridge._detect_prompt("") == False
+        assert bridge._detect_prompt(s) == expected
 
 
 class TestTerminalBridgeHealth:
     """测试健康检查功能"""
     
-    async def test_is_alive(self):
+    async def test_is_alive(self, bridge, running_process):
         """测试进程存活检查"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            # 无进程
-            assert bridge.is_alive() == False
-            
-            # 有进程且存活
-            mock_process = Mock()
-            mock_process.poll.return_value = None
-            bridge.process = mock_process
-            assert bridge.is_alive() == True
-            
-            # 进程已退出
-            mock_process.poll.return_value = 0
-            assert bridge.is_alive() == False
+        # 无进程
+        assert bridge.is_alive() == False
+        
+        # 有进程且存活
+        bridge.process = running_process
+        assert bridge.is_alive() == True
+        
+        # 进程已退出
+        running_process.poll.return_value = 0
+        assert bridge.is_alive() == False
     
-    async def test_is_running_property(self):
+    async def test_is_running_property(self, bridge, running_process):
         """测试 is_running 属性"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            
-            # 初始状态
-            assert bridge.is_running == False
-            
-            # 进程存活但状态未设置
-            mock_process = Mock()
-            mock_process.poll.return_value = None
-            bridge.process = mock_process
-            assert bridge.is_running == False
-            
-            # 两者都满足
-            bridge.state.is_alive = True
-            assert bridge.is_running == True
+        # 初始状态
+        assert bridge.is_running == False
+        
+        # 进程存活但状态未设置
+        bridge.process = running_process
+        assert bridge.is_running == False
+        
+        # 两者都满足
+        bridge.state.is_alive = True
+        assert bridge.is_running == True
     
-    async def test_health_check_restart(self):
+    async def test_health_check_restart(self, bridge):
         """测试健康检查重启"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.health_check_interval = 0.1
-            
-            # 直接测试重启条件
-            bridge.state.restart_count = 0  # 允许重启
-            assert bridge.state.restart_count < bridge.max_restart_attempts
+        bridge.state.is_alive = True
+        bridge.health_check_interval = 0.1
+        
+        # 直接测试重启条件
+        bridge.state.restart_count = 0  # 允许重启
+        assert bridge.state.restart_count < bridge.max_restart_attempts
 
 
 class TestTerminalBridgeCleanup:
     """测试清理功能"""
     
-    async def test_cleanup(self):
+    async def test_cleanup(self, _patch_event_bus, bridge):
         """测试资源清理"""
-        with patch('backend.services.terminal_bridge.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            bridge = TerminalBridge()
-            bridge.master_fd = 3
-            bridge.state.is_alive = True
-            
-            # 创建可取消的 future 而不是 mock
-            async def dummy_coro():
-                await asyncio.sleep(100)
-            
-            bridge._output_task = asyncio.create_task(dummy_coro())
-            bridge._health_check_task = asyncio.create_task(dummy_coro())
-            
-            with patch('backend.services.terminal_bridge.os.close') as mock_close:
-                await bridge._cleanup()
-                
-                # 验证清理操作
-                mock_close.assert_called_once_with(3)
-                assert bridge.master_fd is None
-                assert bridge.state.is_alive == False
-                mock_bus.publish.assert_called()
+        bridge.master_fd = 3
+        bridge.state.is_alive = True
+        
+        # 创建可取消的 future 而不是 mock
+        async def dummy_coro():
+            await asyncio.sleep(100)
+        
+        output_task = asyncio.create_task(dummy_coro())
+        health_check_task = asyncio.create_task(dummy_coro())
+        bridge._output_task = output_task
+        bridge._health_check_task = health_check_task
+        
+        with patch('backend.services.terminal_bridge.os.close') as mock_close:
+            await bridge._cleanup()
             
-            # 确保任务被取消
-            assert bridge._output_task.cancelled()
-            assert bridge._health_check_task.cancelled()
+            # 验证清理操作
+            mock_close.assert_called_once_with(3)
+            assert bridge.master_fd is None
+            assert bridge.state.is_alive == False
+            _patch_event_bus.publish.assert_called()
+        
+        # 一次性等待两个任务结束，并确保它们都被取消
+        await asyncio.wait_for(
+            asyncio.gather(output_task, health_check_task, return_exceptions=True),
+            timeout=1.0
+        )
+        assert output_task.cancelled()
+        assert health_check_task.cancelled()
 
 
 class TestTerminalBridgeWait:
     """测试等待功能"""
     
-    async def test_wait_for_ready_success(self):
+    async def test_wait_for_ready_success(self, bridge):
         """测试成功等待就绪"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.startup_timeout = 1.0
-            
-            # 设置为就绪
-            async def set_ready():
-                await asyncio.sleep(0.1)
-                bridge.state.is_ready = True
-            
-            asyncio.create_task(set_ready())
-            await bridge._wait_for_ready()
-            
-            assert bridge.state.is_ready == True
+        bridge.state.is_alive = True
+        bridge.state.is_ready = True
+        bridge.startup_timeout = 1.0
+        
+        # 已就绪时应立即返回，无需真实等待
+        await bridge._wait_for_ready()
+        
+        assert bridge.state.is_ready == True
     
-    async def test_wait_for_ready_timeout(self):
+    async def test_wait_for_ready_timeout(self, bridge):
         """测试等待超时"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = True
-            bridge.startup_timeout = 0.1
-            
-            # 不设置就绪
-            await bridge._wait_for_ready()
-            
-            # 超时后仍然设置为就绪
-            assert bridge.state.is_ready == True
+        bridge.state.is_alive = True
+        bridge.startup_timeout = 0.0
+        
+        # 不设置就绪，零超时立即到期
+        await bridge._wait_for_ready()
+        
+        # 超时后仍然设置为就绪
+        assert bridge.state.is_ready == True
     
-    async def test_wait_for_ready_process_died(self):
+    async def test_wait_for_ready_process_died(self, bridge):
         """测试等待时进程死亡"""
-        with patch('backend.services.terminal_bridge.get_event_bus'):
-            bridge = TerminalBridge()
-            bridge.state.is_alive = False
-            bridge.startup_timeout = 1.0
-            
-            try:
-                await bridge._wait_for_ready()
-                assert False, "Should raise RuntimeError"
-            except RuntimeError as e:
-                assert "Process died during startup" in str(e)
-
-
-# ===== 主测试运行器 =====
-async def main():
-    """运行所有 TerminalBridge 增强测试"""
-    print("🚀 运行 TerminalBridge 增强测试套件")
-    print("=" * 80)
-    
-    test_classes = [
-        TestTerminalState,
-        TestTerminalBridgeInit,
-        TestTerminalBridgeStart,
-        TestTerminalBridgeStop,
-        TestTerminalBridgeCommands,
-        TestTerminalBridgeOutput,
-        TestTerminalBridgeHealth,
-        TestTerminalBridgeCleanup,
-        TestTerminalBridgeWait
-    ]
-    
-    passed = 0
-    failed = 0
-    
-    for test_class in test_classes:
-        print(f"\n📦 测试类: {test_class.__name__}")
-        print("-" * 40)
-        
-        instance = test_class()
-        
-        # 获取所有测试方法
-        test_methods = [
-            method for method in dir(instance)
-            if method.startswith('test_') and callable(getattr(instance, method))
-        ]
-        
-        for method_name in test_methods:
-            try:
-                print(f"  🧪 {method_name}...", end='', flush=True)
-                method = getattr(instance, method_name)
-                await method()
-                print(" ✅")
-                passed += 1
-            except Exception as e:
-                print(f" ❌ {str(e)}")
-                failed += 1
-                import traceback
-                traceback.print_exc()
-    
-    print("\n" + "=" * 80)
-    print(f"✅ 通过: {passed}")
-    print(f"❌ 失败: {failed}")
-    print(f"总计: {passed + failed}")
-    
-    if passed > 0:
-        print(f"\n📊 TerminalBridge 覆盖率预计提升:")
-        print("   从 33.33% → ~60%")
-        print("   新增 ~30 个测试场景")
-        print("   覆盖了所有核心功能:")
-        print("   ✅ 进程启动和停止")
-        print("   ✅ 命令发送和验证")
-        print("   ✅ 输出处理和回调")
-        print("   ✅ 提示符检测")
-        print("   ✅ 健康检查和重启")
-        print("   ✅ PTY 管理")
-        print("   ✅ 资源清理")
-    
-    return 0 if failed == 0 else 1
-
-
-if __name__ == "__main__":
-    import sys
-    sys.exit(asyncio.run(main()))
\ No newline at end of file
+        bridge.state.is_alive = False
+        bridge.startup_timeout = 1.0
+        
+        with pytest.raises(RuntimeError, match="Process died during startup"):
+            await bridge._wait_for_ready()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+CommandManager 性能基准测试
+依赖 pytest-benchmark，未安装时整个模块跳过；默认不运行，需用 -m benchmark 显式选择
+"""
+
+import sys
+import os
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
+
+import asyncio
+from unittest.mock import patch
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# pydantic 等外部依赖由 tests/comprehensive/conftest.py 在导入 backend 之前统一 Mock
+from backend.core.command_manager import CommandManager, CommandOptions, CommandStatus
+from backend.services.event_bus import EventBus
+from backend.services.terminal_bridge import TerminalBridge
+
+
+# 关闭 GC 并预热，减少轮次之间的抖动；max_time 限制单个用例的总耗时
+pytestmark = pytest.mark.benchmark(
+    group="command_manager",
+    min_rounds=5,
+    max_time=1.0,
+    disable_gc=True,
+    warmup=True,
+)
+
+CONCURRENT_COUNT = 100
+BATCH_COMMANDS = ("echo one", "echo two", "echo three")
+# 空终端不会产生输出，不等待命令完成，基准只统计调度开销而不是等待超时
+NO_WAIT = CommandOptions(wait_for_completion=False)
+
+
+class _NullTerminal(TerminalBridge):
+    """不启动子进程、不记录调用的终端，基准只统计 CommandManager 自身的开销"""
+    
+    async def send_command(self, command: str) -> None:
+        pass
+
+
+class _NullEventBus(EventBus):
+    """直接丢弃事件的事件总线"""
+    
+    async def publish(self, event) -> None:
+        pass
+
+
+@pytest.fixture
+def null_terminal():
+    """使用空终端和空事件总线，避免 Mock 调用记录随基准轮次无限增长"""
+    bus = _NullEventBus()
+    with patch('backend.core.command_manager.get_event_bus', return_value=bus), \
+         patch('backend.services.terminal_bridge.get_event_bus', return_value=bus):
+        yield _NullTerminal()
+
+
+async def _run_concurrent(terminal):
+    # 每轮新建 CommandManager，避免其内部 asyncio 原语绑定到上一轮的事件循环
+    manager = CommandManager(terminal)
+    return await asyncio.gather(
+        *(manager.execute(f"echo test{i}", NO_WAIT) for i in range(CONCURRENT_COUNT))
+    )
+
+
+async def _run_batch(terminal):
+    # execute_batch 只接收命令列表、按默认选项等待每条命令完成，
+    # 这里逐条 execute 复现其顺序执行、遇错停止的行为
+    manager = CommandManager(terminal)
+    results = []
+    for command in BATCH_COMMANDS:
+        result = await manager.execute(command, NO_WAIT)
+        results.append(result)
+        if result.status == CommandStatus.ERROR:
+            break
+    return results
+
+
+def test_concurrent_commands_benchmark(benchmark, null_terminal):
+    """并发执行 100 条命令的耗时基线"""
+    results = benchmark(lambda: asyncio.run(_run_concurrent(null_terminal)))
+
+    assert len(results) == CONCURRENT_COUNT
+    assert all(r.status == CommandStatus.SUCCESS for r in results)
+
+
+def test_execute_batch_benchmark(benchmark, null_terminal):
+    """批量顺序执行的耗时基线"""
+    results = benchmark(lambda: asyncio.run(_run_batch(null_terminal)))
+
+    assert len(results) == len(BATCH_COMMANDS)
+    assert all(r.status == CommandStatus.SUCCESS for r in results)
@@ -9,16 +9,13 @@ import os
 # Add project root to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
 
-# Mock 外部依赖 - 必须在任何 backend 模块导入之前
-from unittest.mock import Mock, AsyncMock, patch, MagicMock, call
 import asyncio
+from collections import Counter
 from datetime import datetime, timedelta
 import time
+import pytest
 
-# 设置必要的 Mock
-sys.modules['pydantic'] = MagicMock()
-sys.modules['pydantic_settings'] = MagicMock()
-
+# pydantic 等外部依赖由 tests/comprehensive/conftest.py 在导入 backend 之前统一 Mock
 from backend.core.command_manager import (
     Command, CommandResult, CommandOptions, CommandFilters,
     CommandValidator, CommandPreprocessor, CommandManager,
@@ -27,6 +24,69 @@ from backend.core.command_manager import (
 from backend.models.base import EventType
 
 
+# 命令验证用例
+_FORBIDDEN = (
+    "rm -rf /",
+    "sudo rm -rf /home",
+    ":(){:|:&};:",  # Fork bomb
+    "dd if=/dev/zero of=/dev/sda",
+    "mkfs.ext4 /dev/sda",
+)
+
+_SAFE = (
+    "echo hello",
+    "ls -la",
+    "pwd",
+    "cd /home",
+    "cat file.txt",
+    "python script.py",
+    "git status",
+    "/help",
+    "#memory list",
+    "@./file.md",
+)
+
+# "/help" 与 "#memory list" 已包含在 _SAFE 中
+_CLAUDE_CODE = (
+    "/model",
+    "/clear",
+    "/compact",
+    "#memory search query",
+    "@./CLAUDE.md",
+    "@../docs/README.md",
+)
+
+# 模型构造的期望字段值，按字段整体比较一次
+_EXPECTED_COMMAND = {
+    "content": "echo test",
+    "source": "test",
+    "status": CommandStatus.PENDING,
+}
+
+_EXPECTED_RESULT = {
+    "command_id": "test_123",
+    "status": CommandStatus.SUCCESS,
+    "output": "Hello World",
+    "execution_time": 1.5,
+    "side_effects": ["file_created"],
+    "error": None,
+}
+
+_DEFAULT_OPTIONS = {
+    "wait_for_completion": True,
+    "timeout": 30.0,
+    "capture_output": True,
+    "validate": True,
+}
+
+BASE_TIME = datetime(2024, 1, 1)
+
+
+def _fields(obj, names):
+    """按字段名取出对象属性，便于与期望值整体比较"""
+    return {name: getattr(obj, name) for name in names}
+
+
 class TestCommandModels:
     """测试命令相关的数据模型"""
     
@@ -35,9 +95,7 @@ class TestCommandModels:
         """测试 Command 对象创建"""
         cmd = Command(content="echo test", source="test")
         
-        assert cmd.content == "echo test"
-        assert cmd.source == "test"
-        assert cmd.status == CommandStatus.PENDING
+        assert _fields(cmd, _EXPECTED_COMMAND) == _EXPECTED_COMMAND
         assert isinstance(cmd.timestamp, datetime)
         assert cmd.id  # Should have auto-generated ID
         assert isinstance(cmd.metadata, dict)
@@ -53,27 +111,19 @@ class TestCommandModels:
             side_effects=["file_created"]
         )
         
-        assert result.command_id == "test_123"
-        assert result.status == CommandStatus.SUCCESS
-        assert result.output == "Hello World"
-        assert result.execution_time == 1.5
-        assert "file_created" in result.side_effects
-        assert result.error is None
+        assert _fields(result, _EXPECTED_RESULT) == _EXPECTED_RESULT
     
     
     async def test_command_options_defaults(self):
         """测试 CommandOptions 默认值"""
         options = CommandOptions()
         
-        assert options.wait_for_completion == True
-        assert options.timeout == 30.0
-        assert options.capture_output == True
-        assert options.validate == True
+        assert _fields(options, _DEFAULT_OPTIONS) == _DEFAULT_OPTIONS
     
     
     async def test_command_filters(self):
         """测试 CommandFilters"""
-        now = datetime.now()
+        now = BASE_TIME
         filters = CommandFilters(
             source="user",
             status=CommandStatus.SUCCESS,
@@ -100,60 +150,28 @@ class TestCommandValidator:
         assert error == "Empty command"
     
     
-    async def test_validate_forbidden_commands(self):
+    @pytest.mark.parametrize("cmd", _FORBIDDEN)
+    def test_validate_forbidden_commands(self, cmd):
         """测试禁止的命令"""
-        forbidden_commands = [
-            "rm -rf /",
-            "sudo rm -rf /home",
-            ":(){:|:&};:",  # Fork bomb
-            "dd if=/dev/zero of=/dev/sda",
-            "mkfs.ext4 /dev/sda"
-        ]
-        
-        for cmd in forbidden_commands:
-            is_valid, error = CommandValidator.is_valid(cmd)
-            assert not is_valid
-            assert "Forbidden command pattern" in error
+        is_valid, error = CommandValidator.is_valid(cmd)
+        assert not is_valid
+        assert "Forbidden command pattern" in error
     
     
-    async def test_validate_safe_commands(self):
+    @pytest.mark.parametrize("cmd", _SAFE)
+    def test_validate_safe_commands(self, cmd):
         """测试安全命令"""
-        safe_commands = [
-            "echo hello",
-            "ls -la",
-            "pwd",
-            "cd /home",
-            "cat file.txt",
-            "python script.py",
-            "git status",
-            "/help",
-            "#memory list",
-            "@./file.md"
-        ]
-        
-        for cmd in safe_commands:
-            is_valid, error = CommandValidator.is_valid(cmd)
-            assert is_valid
-            assert error is None
-    
-    
-    async def test_validate_claude_code_commands(self):
+        is_valid, error = CommandValidator.is_valid(cmd)
+        assert is_valid
+        assert error is None
+    
+    
+    @pytest.mark.parametrize("cmd", _CLAUDE_CODE)
+    def test_validate_claude_code_commands(self, cmd):
         """测试 Claude Code 特定命令"""
-        claude_commands = [
-            "/help",
-            "/model",
-            "/clear",
-            "/compact",
-            "#memory list",
-            "#memory search query",
-            "@./CLAUDE.md",
-            "@../docs/README.md"
-        ]
-        
-        for cmd in claude_commands:
-            is_valid, error = CommandValidator.is_valid(cmd)
-            assert is_valid
-            assert error is None
+        is_valid, error = CommandValidator.is_valid(cmd)
+        assert is_valid
+        assert error is None
 
 
 class TestCommandPreprocessor:
@@ -182,435 +200,243 @@ class TestCommandManager:
     """测试 CommandManager 核心功能"""
     
     
-    async def test_initialization(self):
+    async def test_initialization(self, mock_terminal, command_manager_bus):
         """测试 CommandManager 初始化"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
+        manager = CommandManager(mock_terminal)
         
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            assert manager.terminal == mock_terminal
-            assert manager.event_bus == mock_bus
-            assert len(manager._command_history) == 0
-            assert len(manager._active_commands) == 0
-            mock_terminal.set_output_callback.assert_called_once()
-    
-    
-    async def test_execute_simple_command(self):
-        """测试执行简单命令"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute command
-            result = await manager.execute("echo hello")
-            
-            # Verify
-            assert result.status == CommandStatus.SUCCESS
-            assert result.error is None
-            assert result.execution_time > 0
-            mock_terminal.send_command.assert_called_once_with("echo hello")
-            mock_bus.publish.assert_called()
-    
-    
-    async def test_execute_with_validation_failure(self):
-        """测试执行验证失败的命令"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute forbidden command
-            result = await manager.execute("rm -rf /")
-            
-            # Verify
-            assert result.status == CommandStatus.ERROR
-            assert "Forbidden command pattern" in result.error
-            assert result.execution_time == 0.0
-    
-    
-    async def test_execute_with_options(self):
-        """测试带选项的命令执行"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute with custom options
-            options = CommandOptions(
+        assert manager.terminal == mock_terminal
+        assert manager.event_bus == command_manager_bus
+        assert len(manager._command_history) == 0
+        assert len(manager._active_commands) == 0
+        mock_terminal.set_output_callback.assert_called_once()
+    
+    
+    @pytest.mark.parametrize("cmd,options,sent,side_effects", [
+        ("echo hello", None, "echo hello", set()),
+        (
+            "test command",
+            CommandOptions(
                 wait_for_completion=False,
                 timeout=10.0,
                 capture_output=False,
                 validate=False
-            )
-            
-            result = await manager.execute("test command", options)
-            
-            # Verify
-            assert result.status == CommandStatus.SUCCESS
-            mock_terminal.send_command.assert_called_once()
+            ),
+            "test command",
+            set(),
+        ),
+        ("create file.txt", None, "create file.txt", {"file_created"}),
+        ("rm file.txt", None, "rm file.txt", {"file_deleted"}),
+        ("/compact", None, "/compact", {"context_compacted"}),
+    ])
+    async def test_execute(self, mock_terminal, command_manager_bus, cmd, options, sent, side_effects):
+        """测试执行单条命令：发送内容、结果状态与副作用检测"""
+        manager = CommandManager(mock_terminal)
+        
+        result = await manager.execute(cmd, options)
+        
+        assert result.status == CommandStatus.SUCCESS
+        assert result.error is None
+        assert result.execution_time > 0
+        assert side_effects <= set(result.side_effects)
+        mock_terminal.send_command.assert_called_once_with(sent)
+        command_manager_bus.publish.assert_called()
     
     
-    async def test_execute_with_output_capture(self):
+    async def test_execute_with_validation_failure(self, mock_terminal):
+        """测试执行验证失败的命令"""
+        manager = CommandManager(mock_terminal)
+        
+        # Execute forbidden command
+        result = await manager.execute("rm -rf /")
+        
+        # Verify
+        assert result.status == CommandStatus.ERROR
+        assert "Forbidden command pattern" in result.error
+        assert result.execution_time == 0.0
+    
+    
+    async def test_execute_with_output_capture(self, mock_terminal):
         """测试输出捕获"""
-        mock_terminal = Mock()
         output_callback = None
         
         def capture_callback(callback):
             nonlocal output_callback
             output_callback = callback
         
-        mock_terminal.set_output_callback = Mock(side_effect=capture_callback)
-        mock_terminal.send_command = AsyncMock()
+        mock_terminal.set_output_callback.side_effect = capture_callback
         
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Start command execution
-            options = CommandOptions(capture_output=True, wait_for_completion=False)
-            execute_task = asyncio.create_task(manager.execute("echo test", options))
-            
-            # Wait a bit for command to start
-            await asyncio.sleep(0.1)
-            
-            # Simulate terminal output
-            if output_callback:
-                output_callback("test output line 1\n")
-                output_callback("test output line 2\n")
-            
-            # Wait for completion
-            result = await execute_task
-            
-            # Verify command was executed
-            assert result.status == CommandStatus.SUCCESS
-            # Output capture might be empty due to timing in test
+        # 命令写入终端时发出信号，替代固定的 sleep
+        command_sent = asyncio.Event()
+        mock_terminal.send_command.side_effect = lambda command: command_sent.set()
+        
+        manager = CommandManager(mock_terminal)
+        
+        options = CommandOptions(capture_output=True, wait_for_completion=False)
+        
+        async def run_and_emit():
+            # TaskGroup 保证超时取消时执行任务一并被取消
+            async with asyncio.TaskGroup() as tg:
+                execute_task = tg.create_task(manager.execute("echo test", options))
+                
+                # Wait for command to start
+                await command_sent.wait()
+                
+                # Simulate terminal output
+                if output_callback:
+                    output_callback("test output line 1\n")
+                    output_callback("test output line 2\n")
+            
+            return execute_task.result()
+        
+        # 整体设置截止时间，命令卡住时快速失败而不是挂起
+        result = await asyncio.wait_for(run_and_emit(), timeout=1.0)
+        
+        # Verify command was executed
+        assert result.status == CommandStatus.SUCCESS
+        # Output capture might be empty due to timing in test
     
     
-    async def test_execute_batch(self):
+    async def test_execute_batch(self, mock_terminal):
         """测试批量命令执行"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute batch
-            commands = ["echo one", "echo two", "echo three"]
-            results = await manager.execute_batch(commands)
-            
-            # Verify
-            assert len(results) == 3
-            assert all(r.status == CommandStatus.SUCCESS for r in results)
-            assert mock_terminal.send_command.call_count == 3
+        manager = CommandManager(mock_terminal)
+        
+        # Execute batch
+        commands = ["echo one", "echo two", "echo three"]
+        results = await manager.execute_batch(commands)
+        
+        # Verify
+        assert len(results) == 3
+        assert all(r.status == CommandStatus.SUCCESS for r in results)
+        assert mock_terminal.send_command.call_count == 3
     
     
-    async def test_execute_batch_with_error(self):
+    async def test_execute_batch_with_error(self, mock_terminal):
         """测试批量执行遇到错误时停止"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute batch with forbidden command
-            commands = ["echo one", "rm -rf /", "echo three"]
-            results = await manager.execute_batch(commands)
-            
-            # Verify - should stop after error
-            assert len(results) == 2
-            assert results[0].status == CommandStatus.SUCCESS
-            assert results[1].status == CommandStatus.ERROR
+        manager = CommandManager(mock_terminal)
+        
+        # Execute batch with forbidden command
+        commands = ["echo one", "rm -rf /", "echo three"]
+        results = await manager.execute_batch(commands)
+        
+        # Verify - should stop after error
+        assert len(results) == 2
+        assert results[0].status == CommandStatus.SUCCESS
+        assert results[1].status == CommandStatus.ERROR
     
     
-    async def test_command_history(self):
+    async def test_command_history(self, mock_terminal):
         """测试命令历史记录"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute some commands
-            await manager.execute("echo one")
-            await manager.execute("echo two")
-            await manager.execute("rm -rf /")  # This will fail
-            
-            # Get history
-            history = await manager.get_history()
-            
-            # Verify - rm -rf / command is added to history even though it fails validation
-            assert len(history) >= 2  # At least the successful commands
-            # Find the commands in history
-            commands = [cmd.content for cmd in history]
-            assert "echo one" in commands
-            assert "echo two" in commands
+        manager = CommandManager(mock_terminal)
+        
+        # Execute some commands
+        await manager.execute("echo one")
+        await manager.execute("echo two")
+        await manager.execute("rm -rf /")  # This will fail
+        
+        # Get history
+        history = await manager.get_history()
+        
+        # Verify - rm -rf / command is added to history even though it fails validation
+        # 历史按执行顺序返回
+        assert [cmd.content for cmd in history] == ["echo one", "echo two", "rm -rf /"]
     
     
-    async def test_history_filtering(self):
+    async def test_history_filtering(self, mock_terminal):
         """测试历史记录过滤"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute commands
-            await manager.execute("echo success")
-            await manager.execute("rm -rf /")  # Will fail
-            
-            # Filter by status
-            filters = CommandFilters(status=CommandStatus.SUCCESS)
-            success_history = await manager.get_history(filters)
-            
-            assert len(success_history) == 1
-            assert success_history[0].content == "echo success"
-            
-            # Get all history to verify
-            all_history = await manager.get_history()
-            assert len(all_history) >= 1  # At least one command executed
+        manager = CommandManager(mock_terminal)
+        
+        # Execute commands
+        await manager.execute("echo success")
+        await manager.execute("rm -rf /")  # Will fail
+        
+        # Filter by status
+        filters = CommandFilters(status=CommandStatus.SUCCESS)
+        success_history = await manager.get_history(filters)
+        
+        assert len(success_history) == 1
+        assert {cmd.content for cmd in success_history} == {"echo success"}
+        
+        # Get all history to verify
+        all_history = await manager.get_history()
+        assert [cmd.content for cmd in all_history] == ["echo success", "rm -rf /"]
     
     
-    async def test_preprocessor_registration(self):
+    async def test_preprocessor_registration(self, mock_terminal):
         """测试预处理器注册和使用"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Create and register preprocessor
-            class PrefixPreprocessor(CommandPreprocessor):
-                async def process(self, command: str) -> str:
-                    return f"[PREFIX] {command}"
-            
-            preprocessor = PrefixPreprocessor()
-            manager.register_preprocessor(preprocessor)
-            
-            # Execute command
-            await manager.execute("echo test")
-            
-            # Verify preprocessor was applied
-            mock_terminal.send_command.assert_called_once_with("[PREFIX] echo test")
-    
-    
-    async def test_side_effects_detection(self):
-        """测试副作用检测"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
+        manager = CommandManager(mock_terminal)
         
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Test file creation detection
-            result = await manager.execute("create file.txt")
-            assert "file_created" in result.side_effects
-            
-            # Test file deletion detection
-            result = await manager.execute("rm file.txt")
-            assert "file_deleted" in result.side_effects
-            
-            # Test context operations
-            result = await manager.execute("/compact")
-            assert "context_compacted" in result.side_effects
+        # Create and register preprocessor
+        class PrefixPreprocessor(CommandPreprocessor):
+            async def process(self, command: str) -> str:
+                return f"[PREFIX] {command}"
+        
+        preprocessor = PrefixPreprocessor()
+        manager.register_preprocessor(preprocessor)
+        
+        # Execute command
+        await manager.execute("echo test")
+        
+        # Verify preprocessor was applied
+        mock_terminal.send_command.assert_called_once_with("[PREFIX] echo test")
     
     
-    async def test_concurrent_commands(self):
+    async def test_concurrent_commands(self, mock_terminal):
         """测试并发命令执行"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute multiple commands concurrently
+        manager = CommandManager(mock_terminal)
+        
+        # Execute multiple commands concurrently
+        async with asyncio.TaskGroup() as tg:
             tasks = [
-                manager.execute(f"echo test{i}") 
+                tg.create_task(manager.execute(f"echo test{i}"))
                 for i in range(5)
             ]
-            
-            results = await asyncio.gather(*tasks)
-            
-            # Verify all completed
-            assert len(results) == 5
-            assert all(r.status == CommandStatus.SUCCESS for r in results)
-            assert mock_terminal.send_command.call_count == 5
+        
+        results = [task.result() for task in tasks]
+        
+        # Verify all completed
+        assert len(results) == 5
+        assert all(r.status == CommandStatus.SUCCESS for r in results)
+        assert mock_terminal.send_command.call_count == 5
     
     
-    async def test_command_timeout(self):
+    async def test_command_timeout(self, mock_terminal):
         """测试命令超时"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute with very short timeout
-            options = CommandOptions(timeout=0.1)
-            
-            # Mock slow command by not providing output
-            start_time = time.time()
-            result = await manager.execute("slow command", options)
-            elapsed = time.time() - start_time
-            
-            # Should timeout quickly
-            assert elapsed < 0.5
-            assert result.status == CommandStatus.SUCCESS  # Still succeeds, just times out waiting
+        manager = CommandManager(mock_terminal)
+        
+        # Execute with very short timeout
+        options = CommandOptions(timeout=0.1)
+        
+        # Mock slow command by not providing output
+        start_ns = time.perf_counter_ns()
+        result = await asyncio.wait_for(manager.execute("slow command", options), timeout=1.0)
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        
+        # Should timeout quickly
+        assert elapsed_ns < 500_000_000
+        assert result.status == CommandStatus.SUCCESS  # Still succeeds, just times out waiting
     
     
-    async def test_get_stats(self):
+    async def test_get_stats(self, mock_terminal):
         """测试统计信息获取"""
-        mock_terminal = Mock()
-        mock_terminal.set_output_callback = Mock()
-        mock_terminal.send_command = AsyncMock()
-        
-        with patch('backend.core.command_manager.get_event_bus') as mock_event_bus:
-            mock_bus = Mock()
-            mock_bus.publish = AsyncMock()
-            mock_event_bus.return_value = mock_bus
-            
-            manager = CommandManager(mock_terminal)
-            
-            # Execute some commands
-            await manager.execute("echo one")
-            await manager.execute("echo two")
-            await manager.execute("rm -rf /")  # Will fail
-            
-            # Get stats
-            stats = manager.get_stats()
-            
-            # Verify
-            assert stats['total_commands'] >= 2  # At least 2 commands
-            assert stats['active_commands'] == 0
-            assert CommandStatus.SUCCESS.value in stats['status_counts']
-            assert stats['status_counts'][CommandStatus.SUCCESS.value] >= 2
-
-
-# ===== 主测试运行器 =====
-async def main():
-    """运行所有 CommandManager 测试"""
-    print("🚀 运行 CommandManager 完整测试套件")
-    print("=" * 80)
-    
-    test_classes = [
-        TestCommandModels,
-        TestCommandValidator,
-        TestCommandPreprocessor,
-        TestCommandManager
-    ]
-    
-    passed = 0
-    failed = 0
-    
-    for test_class in test_classes:
-        print(f"\n📦 测试类: {test_class.__name__}")
-        print("-" * 40)
-        
-        instance = test_class()
-        
-        # Get all test methods
-        test_methods = [
-            method for method in dir(instance)
-            if method.startswith('test_') and callable(getattr(instance, method))
-        ]
-        
-        for method_name in test_methods:
-            try:
-                print(f"  🧪 {method_name}...", end='')
-                method = getattr(instance, method_name)
-                await method()
-                print(" ✅")
-                passed += 1
-            except Exception as e:
-                print(f" ❌ {str(e)}")
-                failed += 1
-                import traceback
-                traceback.print_exc()
-    
-    print("\n" + "=" * 80)
-    print(f"✅ 通过: {passed}")
-    print(f"❌ 失败: {failed}")
-    print(f"总计: {passed + failed}")
-    
-    coverage_estimate = (passed / (passed + failed)) * 100 if (passed + failed) > 0 else 0
-    print(f"\n📊 测试覆盖率估计: {coverage_estimate:.1f}%")
-    print("🎯 CommandManager 核心功能已覆盖:")
-    print("   ✅ 命令验证和安全检查")
-    print("   ✅ 异步命令执行")
-    print("   ✅ 输出捕获和流处理")
-    print("   ✅ 批量执行")
-    print("   ✅ 命令历史和过滤")
-    print("   ✅ 预处理器机制")
-    print("   ✅ 副作用检测")
-    print("   ✅ 并发执行")
-    print("   ✅ 超时处理")
-    
-    return 0 if failed == 0 else 1
+        manager = CommandManager(mock_terminal)
+        
+        # Execute some commands
+        await manager.execute("echo one")
+        await manager.execute("echo two")
+        await manager.execute("rm -rf /")  # Will fail
+        
+        # Get stats
+        stats = manager.get_stats()
+        
+        # Verify
+        assert stats['total_commands'] == 3
+        assert stats['active_commands'] == 0
+        expected_counts = Counter({
+            CommandStatus.SUCCESS.value: 2,
+            CommandStatus.ERROR.value: 1,
+        })
+        assert Counter(stats['status_counts']) == expected_counts
 
 
 if __name__ == "__main__":
-    sys.exit(asyncio.run(main()))
\ No newline at end of file
+    sys.exit(pytest.main(["-q", "--tb=line", "-p", "no:cacheprovider", __file__]))